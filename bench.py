@@ -0,0 +1,339 @@
+"""Reproducible benchmark for the /optimize pipeline.
+
+Runs synthetic rosters through POST /optimize against a local fake Google
+server (Distance Matrix, Geocoding, Places and short-link redirects), times
+each stage and records solution quality, and writes everything to JSON:
+
+    python bench.py                                  # default cases -> bench-results.json
+    python bench.py --sizes 50,200,800 --repeat 3
+    python bench.py --out new.json --compare bench-results.json
+
+Every run starts cold: the persistent caches are disabled and the in-process
+ones are cleared before each request. TSPs are solved in-process
+(TSP_WORKERS=1 unless --tsp-workers is given) so solve_tsp_loop is timed
+directly.
+"""
+import argparse, hashlib, json, math, os, platform, random, statistics, subprocess, sys, tempfile, threading, time
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, quote, unquote
+
+CENTER = (33.5731, -7.5898)       # school location of the synthetic district
+SPREAD_DEG = 0.08                 # students within ~9 km of the school
+DETOUR = 1.3                      # fake road distance = haversine x DETOUR
+FAKE_SPEED_KMH = 32.0
+STAGES = ("resolve_maps_link", "google_distance_matrix_cached", "capacity_cluster", "solve_tsp_loop")
+
+# -------------------------------------------------------------------
+# Fake Google server
+# -------------------------------------------------------------------
+def _haversine_m(a, b):
+    (lat1, lng1), (lat2, lng2) = a, b
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    h = math.sin((p2 - p1) / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lng2 - lng1) / 2) ** 2
+    return 2 * 6371008.8 * math.asin(math.sqrt(min(1.0, h)))
+
+def _jitter(*parts) -> float:
+    # deterministic 0.85..1.15 traffic factor per origin/destination pair
+    h = hashlib.blake2b("|".join(parts).encode(), digest_size=4).digest()
+    return 0.85 + 0.3 * int.from_bytes(h, "big") / 0xFFFFFFFF
+
+class FakeGoogle(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # the app's resolver and matrix pools connect in bursts
+
+    def __init__(self, latency_ms: float):
+        super().__init__(("127.0.0.1", 0), FakeGoogleHandler)
+        self.latency = latency_ms / 1000.0
+        self.addresses = {}   # address text -> (lat, lng)
+        self.calls = {}
+        self.elements = 0
+        self.lock = threading.Lock()
+
+    @property
+    def base(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def count(self, kind: str, elements: int = 0) -> None:
+        with self.lock:
+            self.calls[kind] = self.calls.get(kind, 0) + 1
+            self.elements += elements
+
+    def reset_counters(self) -> None:
+        with self.lock:
+            self.calls, self.elements = {}, 0
+
+class FakeGoogleHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _json(self, body) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_HEAD(self):
+        self.do_GET(head=True)
+
+    def do_GET(self, head=False):
+        srv = self.server
+        if srv.latency:
+            time.sleep(srv.latency)
+        url = urlparse(self.path)
+        q = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+        if url.path.startswith("/s/"):  # short link -> long Maps search URL
+            srv.count("shortlink")
+            self.send_response(302)
+            self.send_header("Location", f"{srv.base}/google.com/maps/search/?api=1&query={url.path[3:]}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if url.path.startswith("/google.com/maps"):
+            self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if head:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        if url.path == "/maps/api/distancematrix/json":
+            origins = [tuple(map(float, o.split(","))) for o in q["origins"].split("|")]
+            dests = [tuple(map(float, d.split(","))) for d in q["destinations"].split("|")]
+            if len(origins) * len(dests) > 100:
+                return self._json({"status": "MAX_ELEMENTS_EXCEEDED"})
+            srv.count("distancematrix", len(origins) * len(dests))
+            rows = []
+            for o in origins:
+                elements = []
+                for d in dests:
+                    meters = int(_haversine_m(o, d) * DETOUR)
+                    secs = int(meters / (FAKE_SPEED_KMH / 3.6) * _jitter(str(o), str(d))) + 1
+                    elements.append({"status": "OK", "distance": {"value": meters},
+                                     "duration": {"value": secs}, "duration_in_traffic": {"value": secs}})
+                rows.append({"elements": elements})
+            return self._json({"status": "OK", "rows": rows})
+
+        if url.path in ("/maps/api/geocode/json", "/maps/api/place/findplacefromtext/json"):
+            srv.count(url.path.split("/")[3])
+            c = srv.addresses.get(q.get("address") or q.get("input") or "")
+            if c is None:
+                return self._json({"status": "ZERO_RESULTS", "results": [], "candidates": []})
+            loc = {"geometry": {"location": {"lat": c[0], "lng": c[1]}}}
+            return self._json({"status": "OK", "results": [loc], "candidates": [loc]})
+
+        self._json({"status": "NOT_FOUND"})
+
+# -------------------------------------------------------------------
+# Synthetic rosters
+# -------------------------------------------------------------------
+def make_roster(n: int, seed: int, link_share: float, server: FakeGoogle):
+    """School at CENTER plus n students; link_share of them only have a short link."""
+    rnd = random.Random(seed)
+    students = []
+    for i in range(n):
+        lat = CENTER[0] + rnd.uniform(-SPREAD_DEG, SPREAD_DEG)
+        lng = CENTER[1] + rnd.uniform(-SPREAD_DEG, SPREAD_DEG)
+        if rnd.random() < link_share:
+            address = f"Student {seed}-{i}, Casablanca"
+            server.addresses[address] = (round(lat, 6), round(lng, 6))
+            students.append({"name": f"S{i}", "mapsLink": f"{server.base}/s/{quote(address)}"})
+        else:
+            students.append({"name": f"S{i}", "lat": round(lat, 6), "lng": round(lng, 6)})
+    return {"name": "Bench School", "lat": CENTER[0], "lng": CENTER[1]}, students
+
+def default_cases(sizes, capacities):
+    cases = []
+    for n in sizes:
+        for cap in capacities:
+            need = math.ceil(n / cap)
+            for buses in sorted({need, need + 2}):
+                cases.append({"students": n, "busCount": buses, "busCapacity": cap})
+    return cases
+
+# -------------------------------------------------------------------
+# Stage timing
+# -------------------------------------------------------------------
+class StageTimer:
+    """Wraps app-level functions so every call (from any thread) is timed."""
+    def __init__(self, module, names):
+        self.module = module
+        self.lock = threading.Lock()
+        self.stats = {}
+        self.originals = {}
+        for name in names:
+            self.originals[name] = getattr(module, name)
+            setattr(module, name, self._wrap(name, self.originals[name]))
+
+    def _wrap(self, name, fn):
+        @wraps(fn)
+        def timed(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                dt = time.perf_counter() - t0
+                with self.lock:
+                    s = self.stats.setdefault(name, {"calls": 0, "totalSec": 0.0, "maxSec": 0.0})
+                    s["calls"] += 1
+                    s["totalSec"] += dt
+                    s["maxSec"] = max(s["maxSec"], dt)
+        return timed
+
+    def take(self):
+        with self.lock:
+            out = {name: {k: round(v, 4) if isinstance(v, float) else v
+                          for k, v in self.stats.get(name, {"calls": 0, "totalSec": 0.0, "maxSec": 0.0}).items()}
+                   for name in self.originals}
+            self.stats = {}
+        return out
+
+def reset_caches(app_module, timer: StageTimer) -> None:
+    for name in ("expand_url_cached", "geocode_text_cached", "place_details_latlng_cached",
+                 "find_place_from_text_cached"):
+        getattr(app_module, name).cache_clear()
+    timer.originals["resolve_maps_link"].cache_clear()
+    with app_module._MATRIX_CACHE_LOCK:
+        app_module._MATRIX_CACHE.clear()
+
+# -------------------------------------------------------------------
+# Runner
+# -------------------------------------------------------------------
+def run_case(client, app_module, server, timer, case, args, seed):
+    school, students = make_roster(case["students"], seed, args.link_share, server)
+    payload = {"school": school, "students": students, "busCount": case["busCount"],
+               "busCapacity": case["busCapacity"], "objective": args.objective, "engine": args.engine,
+               "departureTime": "2030-01-07T07:30"}
+    reset_caches(app_module, timer)
+    server.reset_counters()
+    timer.take()
+
+    t0 = time.perf_counter()
+    resp = client.post("/optimize", json=payload)
+    wall = time.perf_counter() - t0
+    body = resp.get_json() or {}
+    routes = body.get("routes") or []
+    return {
+        "status": resp.status_code,
+        "error": body.get("error"),
+        "requestSec": round(wall, 4),
+        "stages": timer.take(),
+        "quality": {
+            "busesUsed": (body.get("summary") or {}).get("busesUsed"),
+            "objectiveCost": sum(r["objectiveCost"] for r in routes),
+            "totalDistanceKm": round(sum(r["totalDistanceKm"] for r in routes), 2),
+            "totalDurationMin": round(sum(r["totalDurationMin"] for r in routes), 1),
+            "totalFuelLiters": (body.get("summary") or {}).get("totalFuelLiters"),
+        },
+        "google": {"calls": dict(server.calls), "matrixElements": server.elements},
+        "diagnostics": body.get("diagnostics"),
+    }
+
+def summarize(runs):
+    ok = [r for r in runs if r["status"] == 200]
+    if not ok:
+        return None
+    return {
+        "requestSec": round(statistics.median(r["requestSec"] for r in ok), 4),
+        "stagesTotalSec": {name: round(statistics.median(r["stages"][name]["totalSec"] for r in ok), 4)
+                           for name in STAGES},
+        "objectiveCost": statistics.median(r["quality"]["objectiveCost"] for r in ok),
+        "busesUsed": statistics.median(r["quality"]["busesUsed"] for r in ok),
+    }
+
+def compare(current, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {c["name"]: c for c in json.load(f)["cases"]}
+    print(f"\n{'case':<28}{'request s':>20}{'objective cost':>26}{'buses':>10}")
+    for case in current["cases"]:
+        old, new = (baseline.get(case["name"]) or {}).get("median"), case["median"]
+        if not old or not new:
+            print(f"{case['name']:<28}{'(no baseline)':>20}")
+            continue
+        dt = (new["requestSec"] - old["requestSec"]) / old["requestSec"] * 100 if old["requestSec"] else 0.0
+        dc = (new["objectiveCost"] - old["objectiveCost"]) / old["objectiveCost"] * 100 if old["objectiveCost"] else 0.0
+        print(f"{case['name']:<28}{new['requestSec']:>10.2f} ({dt:+6.1f}%){new['objectiveCost']:>14} ({dc:+6.1f}%)"
+              f"{old['busesUsed']:>5}->{new['busesUsed']}")
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).strip()
+    except Exception:
+        return None
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", default="50,200,500", help="comma-separated roster sizes")
+    ap.add_argument("--capacities", default="20,40", help="comma-separated bus capacities")
+    ap.add_argument("--repeat", type=int, default=1, help="cold runs per case (median is reported)")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--link-share", type=float, default=0.2, help="share of students given only as a short link")
+    ap.add_argument("--latency-ms", type=float, default=0.0, help="fake server latency per call")
+    ap.add_argument("--objective", default="duration", choices=("duration", "distance", "hybrid"))
+    ap.add_argument("--engine", default="sweep", choices=("sweep", "vrp"))
+    ap.add_argument("--tsp-time-limit", type=int, default=None, help="override TSP_TIME_LIMIT_SEC")
+    ap.add_argument("--tsp-workers", type=int, default=1)
+    ap.add_argument("--out", default="bench-results.json")
+    ap.add_argument("--compare", help="earlier results JSON to compare against")
+    args = ap.parse_args()
+
+    server = FakeGoogle(args.latency_ms)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    # Configure the app before importing it: fake Google, no persistent caches,
+    # no rate limit, in-process TSPs
+    os.environ.update({
+        "GOOGLE_MAPS_API_BASE": server.base,
+        "CACHE_DIR": tempfile.mkdtemp(prefix="sbr-bench-"),
+        "PAIR_CACHE_PATH": "", "RESOLVER_CACHE_PATH": "", "TSP_CACHE_SIZE": "0",
+        "DM_ELEMENTS_PER_SEC": "0", "TSP_WORKERS": str(args.tsp_workers),
+    })
+    if args.tsp_time_limit is not None:
+        # via the environment so spawned TSP workers pick it up as well
+        os.environ["TSP_TIME_LIMIT_SEC"] = str(args.tsp_time_limit)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import app as app_module
+    timer = StageTimer(app_module, STAGES)
+    client = app_module.app.test_client()
+
+    sizes = [int(x) for x in args.sizes.split(",") if x]
+    capacities = [int(x) for x in args.capacities.split(",") if x]
+    results = {
+        "meta": {
+            "startedAt": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": vars(args),
+        },
+        "cases": [],
+    }
+    for case in default_cases(sizes, capacities):
+        name = f"n{case['students']}-b{case['busCount']}-c{case['busCapacity']}"
+        runs = [run_case(client, app_module, server, timer, case, args, args.seed + case["students"])
+                for _ in range(args.repeat)]
+        entry = {"name": name, **case, "runs": runs, "median": summarize(runs)}
+        results["cases"].append(entry)
+        m = entry["median"]
+        if m is None:
+            print(f"{name:<28} failed: {runs[0]['error']}")
+            continue
+        stages = "  ".join(f"{k.split('_')[0]}={v:.2f}s" for k, v in m["stagesTotalSec"].items())
+        print(f"{name:<28} {m['requestSec']:7.2f}s  cost={m['objectiveCost']:<9} buses={m['busesUsed']}  {stages}")
+
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nwrote {args.out}")
+    if args.compare:
+        compare(results, args.compare)
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -355,6 +355,63 @@
   // -----------------------------
   // COMPUTE ROUTE (CALL BACKEND)
   // -----------------------------
+
+  // POST to /optimize/stream and hand each Server-Sent Event to onEvent(name, data).
+  // Resolves with the final result; rejects on an "error" event.
+  async function streamOptimize(payload, onEvent) {
+    const resp = await fetch("/optimize/stream", {
+      method: "POST",
+      headers: { "Content-Type": "application/json", Accept: "text/event-stream" },
+      body: JSON.stringify(payload)
+    });
+
+    if (!resp.ok || !resp.body) {
+      let msg = "Failed to compute routes.";
+      try {
+        msg = (await resp.json()).error || msg;
+      } catch (_) {}
+      throw new Error(msg);
+    }
+
+    const reader = resp.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      let sep;
+      while ((sep = buffer.indexOf("\n\n")) !== -1) {
+        const block = buffer.slice(0, sep);
+        buffer = buffer.slice(sep + 2);
+
+        let name = "message";
+        let data = "";
+        block.split("\n").forEach((line) => {
+          if (line.startsWith("event: ")) name = line.slice(7);
+          else if (line.startsWith("data: ")) data += line.slice(6);
+        });
+        if (!data) continue; // keep-alive comment
+
+        const parsed = JSON.parse(data);
+        if (name === "result") return parsed;
+        if (name === "error") throw new Error(parsed.error || "Failed to compute routes.");
+        onEvent(name, parsed);
+      }
+    }
+    throw new Error("Connection closed before the routes were computed.");
+  }
+
+  function describeProgress(p) {
+    if (p.phase === "resolve") return `Resolving addresses (${p.done}/${p.total})...`;
+    if (p.phase === "matrix" && p.tilesTotal) return `Fetching travel times (${p.tilesDone}/${p.tilesTotal})...`;
+    if (p.phase === "matrix") return "Fetching travel times...";
+    if (p.phase === "solve" && p.maxBusCount) return `Trying ${p.busCount} of ${p.maxBusCount} buses...`;
+    return "Computing routes...";
+  }
+
   async function handleComputeRoute() {
     try {
       dom.computeRouteBtn.disabled = true;
@@ -390,18 +447,23 @@
         payload.weightDuration = parseFloat(dom.weightDuration.value);
       }
 
-      const resp = await fetch("/optimize", {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify(payload)
-      });
-
-      if (!resp.ok) {
-        showMessage("Failed to compute routes.", "error");
-        return;
-      }
+      // Best-so-far plans are shown while the search continues
+      let status = "Computing routes...";
+      let bestSoFar = "";
+      const showProgress = () => {
+        dom.summaryBox.innerHTML = `<h3>Summary</h3><p class="text-muted">${status}</p>${bestSoFar}`;
+      };
 
-      const result = await resp.json();
+      const result = await streamOptimize(payload, (name, data) => {
+        if (name === "plan") {
+          bestSoFar = `<p class="text-subtle" style="font-size:12px;">Best so far: <strong>${data.busesUsed}</strong> bus(es), cost <strong>${data.totalCost}</strong></p>`;
+          renderRoutes(data.routes);
+          drawRoutesOnMap(data.routes);
+        } else {
+          status = describeProgress(data);
+        }
+        showProgress();
+      });
 
       state.lastOptimization = {
         payload,